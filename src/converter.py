@@ -1,52 +1,104 @@
 import argparse
+import hashlib
+import os
+import shutil
 import textwrap
 from pathlib import Path
 import subprocess
 import tempfile
 import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
 
 
-def convert_markdown_to_word(markdown_file: Path, output_file: Path):
+# Markdown image with an online URL. Alt text may contain "]" (e.g. "Figure [1]" or "\]") unless it
+# is followed by "(", so a match never runs on into the next "](" on the same line. Each alternative
+# matches a single character, so there is no lazy backtracking.
+_IMAGE_RE = re.compile(r'!\[((?:[^\]\n]|\](?!\())*)\]\((https?://[^)\n]*)\)')
+
+# Files a Markdown document can pull in: inline image targets, reference definitions ("[id]: path")
+# and HTML <img> sources. Used for the cache key, so only these files can invalidate a cached document.
+_LOCAL_TARGET_RE = re.compile(
+    r'!\[(?:[^\]\n]|\](?!\())*\]\(\s*(?:<([^>\n]+)>|([^)\s]+))'
+    r'|^ {0,3}\[[^\]\n]+\]:\s*<?([^\s>]+)'
+    r'|<img\s[^>]*?src=["\']([^"\']+)',
+    re.MULTILINE | re.IGNORECASE)
+_URL_SCHEME_RE = re.compile(r'[a-z][a-z0-9+.-]+:', re.IGNORECASE) # two or more letters, so not a drive "C:"
+
+
+def _check_not_open(output_file: Path) -> None:
+    """
+    Raise PermissionError if an existing output file cannot be written, e.g. it is open in Word.
+    Word holds a lock that refuses write access, so opening the file for writing fails.
+    """
+    if output_file.exists():
+        try:
+            open(output_file, 'r+b').close()
+        except PermissionError:
+            raise PermissionError(f"Unable to write to \"{output_file}\" - you probably have it open!")
+
+
+def convert_markdown_to_word(markdown_file: Path, output_file: Path, content: str | None = None,
+                             temp_dir: Path | None = None):
     """
     Convert a Markdown file to a Word document using Pandoc.
 
-    :param markdown_file: Path to the input Markdown file
+    :param markdown_file: Path to the input Markdown file (its directory is searched for local images)
     :param output_file: Path to the output Word document
+    :param content: Markdown to convert instead of the file's content, piped to Pandoc on stdin
+    :param temp_dir: Shared temporary directory for images Pandoc downloads (one is created if not given)
     :raises subprocess.CalledProcessError: If Pandoc conversion fails
     :raises PermissionError: If the output file is already open
     """
-    # Check if the file is already open
-    if output_file.exists():
-        try:
-            output_file.rename(output_file)
-        except PermissionError:
-            raise PermissionError(f"Unable to write to \"{output_file}\" - you probably have it open!")
+    if temp_dir is None:
+        with tempfile.TemporaryDirectory() as own_temp_dir:
+            return convert_markdown_to_word(markdown_file, output_file, content, Path(own_temp_dir))
 
-    with tempfile.TemporaryDirectory() as temp_dir: # for images pandoc might download
-        cmd = [
-            'pandoc', # The command to run Pandoc
-            str(markdown_file), # Input file
-            '-o', str(output_file), # Output file
-            f'--extract-media={temp_dir}',  # Automatic image download (if permitted) into temp directory.
-            '--resource-path', str(markdown_file.parent), # Tell Pandoc where to find local images
-            '--wrap=preserve', # Preserve line breaks from original Markdown in the output
-            '-t', 'docx'  # Make output format as Word document
-        ]
+    _check_not_open(output_file)
 
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True) # run pandoc
-        except subprocess.CalledProcessError as e:
-            print(f"Error converting {markdown_file}: {e}")
-            print(f"Pandoc output: {e.output}")
-            raise
+    # Pandoc reads stdin when no input file is given, so in-memory content never touches disk
+    source = [str(markdown_file)] if content is None else ['-f', 'markdown']
+    stdin = None if content is None else content.encode('utf-8') # Pandoc expects UTF-8
 
+    cmd = [
+        'pandoc', # The command to run Pandoc
+        *source, # Input file or Markdown from stdin
+        '-o', str(output_file), # Output file
+        f'--extract-media={temp_dir / output_file.stem}',  # Automatic image download (if permitted), own folder per document
+        '--resource-path', str(markdown_file.parent), # Tell Pandoc where to find local images
+        '--wrap=preserve', # Preserve line breaks from original Markdown in the output
+        '-t', 'docx'  # Make output format as Word document
+    ]
 
-def _find_local_image(file_name: str, markdown_file_path: Path) -> Path | None:
+    try:
+        # run pandoc; it prints nothing on success with -o, so only keep stderr (decoded on failure only)
+        subprocess.run(cmd, input=stdin, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as e:
+        # One print call so the lines stay together when files are converted in parallel
+        print(f"Error converting {markdown_file}: {e}\n"
+              f"Pandoc output: {e.stderr.decode('utf-8', errors='replace')}")
+        raise
+
+
+def _list_local_files(directory: Path) -> dict[str, str]:
+    """
+    Map the lower-cased names of the entries in a directory to their paths.
+    Uses os.scandir so no Path object is built for entries that never match.
+    """
+    local_files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            local_files.setdefault(entry.name.lower(), entry.path) # first match wins, as before
+    return local_files
+
+
+def _find_local_image(file_name: str, local_files: dict[str, str]) -> Path | None:
     """
     Find a local file with a case-insensitive match to the image filename.
-    Searches in the same directory as the Markdown file.
+    `local_files` maps lower-cased names to the files in the Markdown file's directory.
     """
-    return next((f for f in markdown_file_path.parent.iterdir() if f.name.lower() == file_name.lower()), None)
+    local_file = local_files.get(file_name.lower())
+    return Path(local_file) if local_file else None
 
 
 def correct_image_paths(markdown_content: str, markdown_file_path: Path) -> str:
@@ -61,95 +113,196 @@ def correct_image_paths(markdown_content: str, markdown_file_path: Path) -> str:
     def replace_path(match):
         alt_text, old_path = match.groups()
         file_name = Path(old_path).name
-        local_file = _find_local_image(file_name, markdown_file_path)
+        local_file = _find_local_image(file_name, local_files)
         # Link with local file target else original url (text) only
         return f'![{alt_text}]({local_file})' if local_file else f"[CLICK TO VIEW ONLINE IMAGE: ({alt_text})]({old_path})"
-        
-    pattern_markdown_image = r'!\[(.*?)\]\((https?://.*?)\)'
-    return re.sub(pattern_markdown_image, replace_path, markdown_content)
 
+    # Every online image contains "](http" - skip the directory listing and regex when there are none
+    if '](http' not in markdown_content:
+        return markdown_content
 
-def _process_single_markdown_file(markdown_file: Path, output_dir: Path) -> None:
+    # List the directory once per document rather than once per image
+    local_files = _list_local_files(markdown_file_path.parent)
+    return _IMAGE_RE.sub(replace_path, markdown_content)
+
+
+def _local_file_stats(content: str, markdown_file: Path) -> list[tuple[str, int | None, int | None]]:
+    """
+    List (target, size, modification time) for every local file the Markdown content refers to:
+    inline image targets, reference definitions and HTML <img> sources. Missing files are listed
+    with None so that adding them later changes the result.
+
+    :param content: Markdown content as it will be passed to Pandoc
+    :param markdown_file: Path to the input Markdown file (relative targets are resolved against its folder)
+    :return: Sorted list of (target, size, mtime_ns) tuples
+    :raises OSError: If a referenced file exists but cannot be checked
+    """
+    targets = {unquote(match.group(match.lastindex)) for match in _LOCAL_TARGET_RE.finditer(content)}
+    stats = []
+    for target in sorted(targets):
+        if _URL_SCHEME_RE.match(target):
+            continue # online (or data:) target, Pandoc does not read it from disk
+        try:
+            stat = (markdown_file.parent / target).stat()
+            stats.append((target, stat.st_size, stat.st_mtime_ns))
+        except (FileNotFoundError, NotADirectoryError):
+            stats.append((target, None, None))
+    return stats
+
+
+def _cached_docx_path(content: str, markdown_file: Path, output_dir: Path) -> Path:
+    """
+    Path of the cached Word document for this Markdown content.
+    The key covers the content and the size and modification time of the local files it refers to,
+    so editing, adding or removing one of its images invalidates it (other files in the folder do not).
+
+    :param content: Markdown content as it will be passed to Pandoc
+    :param markdown_file: Path to the input Markdown file
+    :param output_dir: Directory for output Word documents (the cache lives in its ".cache" folder)
+    :return: Path to the cached Word document ("<stem>-<sha256>.docx"), which may not exist yet
+    :raises OSError: If a referenced file exists but cannot be checked
+    """
+    local_file_stats = repr(_local_file_stats(content, markdown_file))
+    key = hashlib.sha256(content.encode('utf-8') + local_file_stats.encode('utf-8')).hexdigest()
+    return output_dir / '.cache' / f'{markdown_file.stem}-{key}.docx'
+
+
+def _store_in_cache(output_file: Path, cached_file: Path) -> None:
+    """
+    Copy a converted Word document into the cache and remove older cache entries for the same document.
+    The copy is written under a temporary name and moved into place, so a cache entry is never half-written.
+
+    :param output_file: Path to the converted Word document
+    :param cached_file: Path returned by _cached_docx_path
+    """
+    cached_file.parent.mkdir(exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(suffix='.tmp', dir=cached_file.parent)
+    os.close(fd)
+    try:
+        shutil.copyfile(output_file, temp_name)
+        os.replace(temp_name, cached_file)
+    except OSError:
+        os.remove(temp_name)
+        raise
+
+    # Same "<stem>-" prefix and length means an older key for the same document (the key is fixed-length)
+    prefix = f'{output_file.stem}-'
+    with os.scandir(cached_file.parent) as entries:
+        for entry in entries:
+            if (entry.name != cached_file.name and entry.name.startswith(prefix)
+                    and len(entry.name) == len(cached_file.name)):
+                Path(entry.path).unlink(missing_ok=True)
+
+
+def _process_single_markdown_file(markdown_file: Path, output_dir: Path, temp_dir: Path | None = None) -> str:
     """
     Process a single Markdown file: correct image paths and convert to Word.
     Assumes images are in the same directory as the Markdown file.
+    Unchanged files are copied from the cache of earlier runs instead of running Pandoc again.
 
     :param markdown_file: Path to the input Markdown file
     :param output_dir: Directory for output Word documents
-    :raises subprocess.CalledProcessError: If Word conversion fails
-    :raises PermissionError: If the output file is already open
+    :param temp_dir: Shared temporary directory for images Pandoc downloads
+    :return: Status line for the caller to print, so parallel conversions report in a fixed order
     """
-    content = markdown_file.read_text(encoding='utf-8')
+    with open(markdown_file, 'rb') as f: # one read and one decode, no TextIOWrapper
+        content = f.read().decode('utf-8')
     content_with_local_images = correct_image_paths(content, markdown_file)
 
-    with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.md', delete=False) as temp_file:
-        temp_file.write(content_with_local_images)
-        temp_md_file = Path(temp_file.name)
+    output_file = output_dir / (markdown_file.stem + '.docx')
 
+    # The cache is best-effort: if it cannot be read or written, convert as if there were no cache
     try:
-        output_file = output_dir / (markdown_file.stem + '.docx')
-        convert_markdown_to_word(temp_md_file, output_file)
-        print(f"  ✅ Converted {markdown_file.name} to {output_file.name}")
+        cached_file = _cached_docx_path(content_with_local_images, markdown_file, output_dir)
+    except OSError:
+        cached_file = None
+
+    try:
+        if cached_file is not None and cached_file.exists():
+            _check_not_open(output_file)
+            try:
+                shutil.copyfile(cached_file, output_file) # kernel-side copy (sendfile on Linux, fcopyfile on macOS)
+                return f"  ✅ Converted {markdown_file.name} to {output_file.name} (unchanged, from cache)"
+            except OSError:
+                pass # unreadable cache entry - convert below
+        convert_markdown_to_word(markdown_file, output_file, content_with_local_images, temp_dir)
+        if cached_file is not None:
+            try:
+                _store_in_cache(output_file, cached_file)
+            except OSError:
+                pass # the document converted fine, it just won't be reused next run
+        return f"  ✅ Converted {markdown_file.name} to {output_file.name}"
     except PermissionError as e:
-        print(f"  ❌ Failed to convert {markdown_file.name}: {str(e)}")
+        return f"  ❌ Failed to convert {markdown_file.name}: {str(e)}"
     except subprocess.CalledProcessError:
-        print(f"  ❌ Failed to convert {markdown_file.name}: Pandoc error occurred")
-    finally:
-        temp_md_file.unlink()
+        return f"  ❌ Failed to convert {markdown_file.name}: Pandoc error occurred"
 
 
-def process_markdown_files(input_path: Path, output_dir: Path) -> None:
+def process_markdown_files(input_path: Path, output_dir: Path, temp_dir: Path | None = None) -> None:
     """
     Process Markdown files from the input path.
     
     :param input_path: Path to input file or directory
     :param output_dir: Directory for output Word documents
+    :param temp_dir: Shared temporary directory for images Pandoc downloads (one per conversion if not given)
     """
     if input_path.is_file():
         if input_path.suffix.lower() == '.md':
-            _process_single_markdown_file(input_path, output_dir)
+            print(_process_single_markdown_file(input_path, output_dir, temp_dir))
         else:
             print(f"  ❌ \"{input_path}\" is not a Markdown file.")
     elif input_path.is_dir():
-        markdown_files = list(input_path.glob('*.md'))
+        # normcase matches ".MD" on Windows and only ".md" on POSIX, like Path.glob('*.md')
+        with os.scandir(input_path) as entries:
+            markdown_files = [Path(entry.path) for entry in entries
+                              if os.path.normcase(entry.name).endswith('.md') and entry.is_file()]
         if not markdown_files:
             print(f"  ❌ No Markdown files found in folder '{input_path}'")
             return
-        for markdown_file in markdown_files:
-            try:
-                _process_single_markdown_file(markdown_file, output_dir)
-            except Exception as e:
-                print(f"  ❌ Error processing '{markdown_file.name}': {str(e)}")
+        # Files are independent and the work is waiting on Pandoc, so run conversions side by side.
+        # Results are printed here, in submission order, so output from workers never interleaves.
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = {executor.submit(_process_single_markdown_file, markdown_file, output_dir, temp_dir): markdown_file
+                       for markdown_file in markdown_files}
+            for future, markdown_file in futures.items():
+                if future.exception():
+                    print(f"  ❌ Error processing '{markdown_file.name}': {str(future.exception())}")
+                else:
+                    print(future.result())
     else:
         print(f"Error: '{input_path}' is neither a file nor a directory.")
 
 
+# Help text for parse_arguments, dedented once at import
+_EPILOG = textwrap.dedent("""
+    ----------------------------------------------------------------------------------------------
+    🎯 Usage Examples:
+       • python converter.py                             # Use default input and output folders
+       • python converter.py input_folder output_folder  # Convert all .md files in input_folder
+       • python converter.py input_file.md output_folder # Convert a single Markdown file
+    ----------------------------------------------------------------------------------------------
+    """)
+_INPUT_HELP = textwrap.dedent("""
+    Input file or directory. Can be a single .md file
+    or a folder containing .md files. If not specified,
+    the default "x-input" folder will be used.
+    """)
+_OUTPUT_HELP = textwrap.dedent("""
+    Output directory for the converted Word documents.
+    If not specified, the default "x-output" folder 
+    will be used.
+    """)
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Convert Markdown files to Word documents.",
-        epilog=textwrap.dedent("""
-        ----------------------------------------------------------------------------------------------
-        🎯 Usage Examples:
-           • python converter.py                             # Use default input and output folders
-           • python converter.py input_folder output_folder  # Convert all .md files in input_folder
-           • python converter.py input_file.md output_folder # Convert a single Markdown file
-        ----------------------------------------------------------------------------------------------
-        """),
+        epilog=_EPILOG,
         formatter_class=argparse.RawTextHelpFormatter
     )
 
-    parser.add_argument("input", nargs="?", default="x-INPUT",
-                        help=textwrap.dedent("""
-                        Input file or directory. Can be a single .md file
-                        or a folder containing .md files. If not specified,
-                        the default "x-input" folder will be used.
-                        """))
-    parser.add_argument("output", nargs="?", default="x-OUTPUT",
-                        help=textwrap.dedent("""
-                        Output directory for the converted Word documents.
-                        If not specified, the default "x-output" folder 
-                        will be used.
-                        """))
+    parser.add_argument("input", nargs="?", default="x-INPUT", help=_INPUT_HELP)
+    parser.add_argument("output", nargs="?", default="x-OUTPUT", help=_OUTPUT_HELP)
     args = parser.parse_args()
 
     # Ensure that either both or no arguments are provided
@@ -181,7 +334,8 @@ def main() -> None:
     output_dir.mkdir(exist_ok=True)
 
     print(f"\n🟤 Processing input from:\n   {input_path.resolve()}")
-    process_markdown_files(input_path, output_dir)
+    with tempfile.TemporaryDirectory() as temp_dir: # one folder for all images pandoc might download
+        process_markdown_files(input_path, output_dir, Path(temp_dir))
     print(f"\n🟫 Output directory for converted docx:\n   {output_dir.resolve()}")
     print()
 
@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
 from docx import Document
+import src.converter
 from src.converter import convert_markdown_to_word, correct_image_paths, process_markdown_files
 
 
@@ -22,6 +23,18 @@ def output_dir(tmp_path):
     return output_dir
 
 
+# Replace Pandoc with a stub that writes the Markdown it receives, so cache tests run without Pandoc
+@pytest.fixture
+def conversions(monkeypatch):
+    """Stub out convert_markdown_to_word and return the list of files it was called for."""
+    converted_files = []
+    def fake_convert(markdown_file, output_file, content=None, temp_dir=None):
+        converted_files.append(markdown_file)
+        output_file.write_bytes(content.encode('utf-8'))
+    monkeypatch.setattr(src.converter, "convert_markdown_to_word", fake_convert)
+    return converted_files
+
+
 # Test basic Markdown to Word conversion with proper content and structure
 def test_basic_markdown_to_word_conversion(input_dir, output_dir):
     md_content = "# Heading 1\n\n## Heading 2\n\njust a [link](https://www.google.com)"
@@ -89,6 +102,23 @@ def test_image_path_correction_for_mixed_local_and_missing(input_dir):
     assert corrected_content == expected, "Incorrect handling of mixed local and missing images"
 
 
+# Test that an image with a local path on the same line as an online image is left untouched
+def test_image_path_correction_keeps_local_image_before_online_image(input_dir):
+    md_content = "![local](local.png) and ![online](https://example.com/missing.png)"
+    corrected_content = correct_image_paths(md_content, input_dir)
+    expected_content = "![local](local.png) and [CLICK TO VIEW ONLINE IMAGE: (online)](https://example.com/missing.png)"
+    assert corrected_content == expected_content, "Only the online image should be rewritten"
+
+
+# Test that alt text with balanced or escaped brackets is still recognised as an online image
+def test_image_path_correction_for_brackets_in_alt_text(input_dir):
+    md_content = "![Figure [1]](https://example.com/a.png) ![a \\] b](https://example.com/b.png)"
+    corrected_content = correct_image_paths(md_content, input_dir)
+    expected_content = ("[CLICK TO VIEW ONLINE IMAGE: (Figure [1])](https://example.com/a.png) "
+                        "[CLICK TO VIEW ONLINE IMAGE: (a \\] b)](https://example.com/b.png)")
+    assert corrected_content == expected_content, "Brackets in alt text should not stop the image from matching"
+
+
 # Test processing of multiple Markdown files into Word documents
 def test_multiple_markdown_files_processing(input_dir, output_dir):
     for i in range(3):
@@ -132,3 +162,53 @@ def test_local_and_online_images_in_processed_files(input_dir, output_dir):
 
     # NEEDED: An assert to ensure 
     # "CLICK TO VIEW ONLINE IMAGE: (Online Image)" is a hyperlink with target "https://example.com/online_image.png"
+
+
+# Test that an unchanged Markdown file is copied from the cache instead of being converted again
+def test_unchanged_markdown_file_is_reused_from_cache(input_dir, output_dir, conversions):
+    md_file = input_dir / "test.md"
+    md_file.write_text("# Cached")
+    output_file = output_dir / "test.docx"
+
+    process_markdown_files(md_file, output_dir)
+    output_file.unlink()
+    process_markdown_files(md_file, output_dir)
+    assert len(conversions) == 1, "Unchanged file should not be converted again"
+    assert output_file.read_bytes() == b"# Cached", "Cached Word file should be copied to the output"
+
+    md_file.write_text("# Edited")
+    process_markdown_files(md_file, output_dir)
+    assert len(conversions) == 2, "Edited file should be converted again"
+    assert output_file.read_bytes() == b"# Edited", "Output should reflect the edited file"
+
+
+# Test that editing an image next to an unchanged Markdown file (also in a subfolder) converts it again
+def test_edited_image_invalidates_cache(input_dir, output_dir, conversions):
+    (input_dir / "img").mkdir()
+    (input_dir / "a.png").write_bytes(b"old")
+    (input_dir / "img" / "b.png").write_bytes(b"old")
+    md_file = input_dir / "test.md"
+    md_file.write_text("![a](a.png)\n![b](img/b.png)")
+
+    process_markdown_files(md_file, output_dir)
+    (input_dir / "a.png").write_bytes(b"new image")
+    process_markdown_files(md_file, output_dir)
+    assert len(conversions) == 2, "Edited image should cause a new conversion"
+
+    (input_dir / "img" / "b.png").write_bytes(b"new image")
+    process_markdown_files(md_file, output_dir)
+    assert len(conversions) == 3, "Edited image in a subfolder should cause a new conversion"
+    assert len(list((output_dir / ".cache").iterdir())) == 1, "Only the latest cache entry should be kept"
+
+
+# Test that editing one Markdown file in a folder only converts that file again
+def test_editing_one_markdown_file_keeps_others_cached(input_dir, output_dir, conversions):
+    for name in ("a", "b", "c"):
+        (input_dir / f"{name}.md").write_text(f"# {name}")
+
+    process_markdown_files(input_dir, output_dir)
+    assert len(conversions) == 3, "Every file should be converted on the first run"
+
+    (input_dir / "a.md").write_text("# a, edited")
+    process_markdown_files(input_dir, output_dir)
+    assert conversions[3:] == [input_dir / "a.md"], "Only the edited file should be converted again"